@@ -16,13 +16,42 @@ from tkinter import ttk, messagebox, filedialog
 import sqlite3
 from datetime import date
 import csv
+import io
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 DB = "attendance.db"
 
+# attendance.status is stored as an integer
+_STATUS_CODE = {"Present": 1, "Absent": 0}
+
+# queries run on every UI action; kept as constants so the statement cache key is stable
+_SQL_INSERT_STUDENT = "INSERT INTO students (student_id, name) VALUES (?, ?)"
+_SQL_UPSERT_ATT = """INSERT INTO attendance (student_id, att_date, status) VALUES (?, ?, ?)
+                     ON CONFLICT(student_id, att_date) DO UPDATE SET status=excluded.status"""
+_SQL_JOIN_ATT = """SELECT s.student_id, s.name,
+                          CASE IFNULL(a.status, 0) WHEN 1 THEN 'Present' ELSE 'Absent' END
+                   FROM students s
+                   LEFT JOIN attendance a ON s.student_id = a.student_id AND a.att_date=?
+                   ORDER BY s.name"""
+
+_conn = None
+
+def get_conn():
+    # one shared connection, opened lazily; transactions are managed explicitly
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(DB, isolation_level=None, check_same_thread=False)
+    return _conn
+
 def init_db():
-    conn = sqlite3.connect(DB)
+    conn = get_conn()
     cur = conn.cursor()
+    # WAL is persisted in the db file; the rest apply to the shared connection
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.execute("PRAGMA cache_size=-20000")
     cur.execute("""CREATE TABLE IF NOT EXISTS students (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     student_id TEXT UNIQUE,
@@ -32,59 +61,79 @@ def init_db():
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     student_id TEXT,
                     att_date TEXT,
-                    status TEXT,
+                    status INTEGER,
                     FOREIGN KEY(student_id) REFERENCES students(student_id)
                 )""")
-    conn.commit()
-    conn.close()
+    _migrate_status_to_int(cur)
+    # enforce only after the rebuild, which runs over data that was never checked
+    cur.execute("PRAGMA foreign_keys=ON")
+    # one row per student per date; student_id leads, so it also serves the
+    # FK checks and the join on student_id
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS uq_att_sid_date ON attendance(student_id, att_date)")
+
+def _migrate_status_to_int(cur):
+    # older databases stored status as 'Present'/'Absent' text; rebuild as 0/1
+    cur.execute("PRAGMA table_info(attendance)")
+    if any(col[1] == "status" and col[2].upper() == "INTEGER" for col in cur.fetchall()):
+        return
+    cur.execute("BEGIN")
+    try:
+        cur.execute("""CREATE TABLE attendance_new (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        student_id TEXT,
+                        att_date TEXT,
+                        status INTEGER,
+                        FOREIGN KEY(student_id) REFERENCES students(student_id)
+                    )""")
+        cur.execute("""INSERT INTO attendance_new (id, student_id, att_date, status)
+                       SELECT id, student_id, att_date, CASE status WHEN 'Present' THEN 1 ELSE 0 END
+                       FROM attendance""")
+        cur.execute("DROP TABLE attendance")
+        cur.execute("ALTER TABLE attendance_new RENAME TO attendance")
+        cur.execute("COMMIT")
+    except Exception:
+        cur.execute("ROLLBACK")
+        raise
 
 def add_student(student_id, name):
     try:
-        conn = sqlite3.connect(DB)
-        cur = conn.cursor()
-        cur.execute("INSERT INTO students (student_id, name) VALUES (?, ?)", (student_id, name))
-        conn.commit()
-        conn.close()
+        cur = get_conn().cursor()
+        cur.execute(_SQL_INSERT_STUDENT, (student_id, name))
         return True, "Student added."
     except Exception as e:
         return False, str(e)
 
-def get_students():
-    conn = sqlite3.connect(DB)
-    cur = conn.cursor()
-    cur.execute("SELECT student_id, name FROM students ORDER BY name")
-    rows = cur.fetchall()
-    conn.close()
-    return rows
-
 def mark_attendance(att_date, records):
-    conn = sqlite3.connect(DB)
+    # the whole batch runs in one explicit transaction
+    conn = get_conn()
     cur = conn.cursor()
-    # remove existing for that date to allow re-marking
-    cur.execute("DELETE FROM attendance WHERE att_date=?", (att_date,))
-    for student_id, status in records.items():
-        cur.execute("INSERT INTO attendance (student_id, att_date, status) VALUES (?, ?, ?)", (student_id, att_date, status))
-    conn.commit()
-    conn.close()
+    try:
+        cur.execute("BEGIN")
+        # upsert so re-marking a date updates rows in place
+        cur.executemany(_SQL_UPSERT_ATT,
+                        [(sid, att_date, _STATUS_CODE.get(st, 0))
+                         for sid, st in records.items()])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+def _attendance_cursor(att_date):
+    cur = get_conn().cursor()
+    cur.execute(_SQL_JOIN_ATT, (att_date,))
+    return cur
 
 def get_attendance_for_date(att_date):
-    conn = sqlite3.connect(DB)
-    cur = conn.cursor()
-    cur.execute("""SELECT s.student_id, s.name, IFNULL(a.status, 'Absent') 
-                   FROM students s
-                   LEFT JOIN attendance a ON s.student_id = a.student_id AND a.att_date=?
-                   ORDER BY s.name""", (att_date,))
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    return _attendance_cursor(att_date).fetchall()
 
 def export_csv(att_date, dest_path):
-    rows = get_attendance_for_date(att_date)
+    # format rows from the cursor in memory, then hit the disk with one write
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["Student ID", "Name", "Status", "Date"])
+    writer.writerows((sid, name, status, att_date) for sid, name, status in _attendance_cursor(att_date))
     with open(dest_path, "w", newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(["Student ID", "Name", "Status", "Date"])
-        for sid, name, status in rows:
-            writer.writerow([sid, name, status, att_date])
+        f.write(buf.getvalue())
 
 # --- Tkinter UI ---
 class AttendanceApp(tk.Tk):
@@ -93,6 +142,11 @@ class AttendanceApp(tk.Tk):
         self.title("Student Attendance Management")
         self.geometry("700x500")
         self.resizable(False, False)
+        # single worker: all DB calls run off the Tk thread, one at a time
+        self._db_pool = ThreadPoolExecutor(max_workers=1)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        # mirrors the status column so saving needs no Treeview reads
+        self._status_by_sid = {}
         self.create_widgets()
 
     def create_widgets(self):
@@ -150,13 +204,36 @@ class AttendanceApp(tk.Tk):
         self.txt_view = tk.Text(frm_view, width=78, height=4)
         self.txt_view.place(x=10, y=40)
 
+    def on_close(self):
+        self._db_pool.shutdown(wait=True)
+        self.destroy()
+
+    def run_db(self, on_done, func, *args):
+        future = self._db_pool.submit(func, *args)
+        self._poll_db(future, on_done)
+
+    def _poll_db(self, future, on_done):
+        # poll from the Tk thread so the worker never touches widgets
+        if not future.done():
+            self.after(20, self._poll_db, future, on_done)
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+            return
+        on_done(result)
+
     def add_student_ui(self):
         sid = self.ent_id.get().strip()
         name = self.ent_name.get().strip()
         if not sid or not name:
             messagebox.showwarning("Input", "Enter both Student ID and Name.")
             return
-        ok, msg = add_student(sid, name)
+        self.run_db(self._on_student_added, add_student, sid, name)
+
+    def _on_student_added(self, result):
+        ok, msg = result
         if ok:
             messagebox.showinfo("Success", msg)
             self.ent_id.delete(0, tk.END)
@@ -165,12 +242,18 @@ class AttendanceApp(tk.Tk):
             messagebox.showerror("Error", msg)
 
     def load_students_for_marking(self):
-        for i in self.tree.get_children():
-            self.tree.delete(i)
-        students = get_students()
-        for sid, name in students:
-            # default Absent unless there is record
-            self.tree.insert("", tk.END, values=(sid, name, "Absent"))
+        att_date = self.ent_date.get().strip()
+        # roster plus any status already saved for the date, in one query
+        self.run_db(self._fill_tree, get_attendance_for_date, att_date)
+
+    def _fill_tree(self, rows):
+        # clear all rows in a single Tcl call
+        self.tree.delete(*self.tree.get_children())
+        insert = self.tree.insert
+        # show the saved status for the date; Absent when there is no record
+        for sid, name, status in rows:
+            insert("", tk.END, values=(sid, name, status))
+        self._status_by_sid = {sid: status for sid, _, status in rows}
 
     def set_status_selected(self, status):
         sel = self.tree.selection()
@@ -178,6 +261,7 @@ class AttendanceApp(tk.Tk):
             vals = list(self.tree.item(s, "values"))
             vals[2] = status
             self.tree.item(s, values=vals)
+            self._status_by_sid[vals[0]] = status
 
     def show_context(self, event):
         try:
@@ -191,12 +275,9 @@ class AttendanceApp(tk.Tk):
         if not att_date:
             messagebox.showwarning("Input", "Enter date.")
             return
-        records = {}
-        for item in self.tree.get_children():
-            sid, name, status = self.tree.item(item, "values")
-            records[sid] = status
-        mark_attendance(att_date, records)
-        messagebox.showinfo("Saved", f"Attendance saved for {att_date}")
+        records = dict(self._status_by_sid)
+        self.run_db(lambda _: messagebox.showinfo("Saved", f"Attendance saved for {att_date}"),
+                    mark_attendance, att_date, records)
 
     def export_attendance(self):
         att_date = self.ent_date.get().strip()
@@ -205,20 +286,20 @@ class AttendanceApp(tk.Tk):
             return
         f = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV","*.csv")], initialfile=f"attendance_{att_date}.csv")
         if f:
-            export_csv(att_date, f)
-            messagebox.showinfo("Exported", f"Attendance exported to {f}")
+            f = os.path.normpath(f)
+            self.run_db(lambda _: messagebox.showinfo("Exported", f"Attendance exported to {f}"),
+                        export_csv, att_date, f)
 
     def show_attendance_view(self):
         att_date = self.view_date.get().strip()
-        rows = get_attendance_for_date(att_date)
+        self.run_db(self._fill_view, get_attendance_for_date, att_date)
+
+    def _fill_view(self, rows):
         self.txt_view.delete(1.0, tk.END)
         if not rows:
             self.txt_view.insert(tk.END, "No students found.\n")
             return
-        lines = []
-        for sid, name, status in rows:
-            lines.append(f"{sid} | {name} -> {status}")
-        self.txt_view.insert(tk.END, "\n".join(lines))
+        self.txt_view.insert(tk.END, "\n".join(f"{sid} | {name} -> {status}" for sid, name, status in rows))
 
 if __name__ == "__main__":
     init_db()